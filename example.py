@@ -13,5 +13,5 @@ token = "secret_wPO2C5mhbFBHeRfFsoS8bxtDBARceyEFUavwMwGDfvi"  # for the demo, us
 url = "https://lvinwan.notion.site/Example-Notion-Page-f8deb4d042034c6c8d03b6de37a99498"  # again, just for the demo, use this as-is if you're feeling lazy
 
 exporter = NotionExporter(token=token)
-path = exporter.export_url(url=url)
-print(f" * Exported to {path}")
+journal = exporter.export_url(url=url)
+print(f" * Exported to {journal['output']}")
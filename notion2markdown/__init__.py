@@ -1,25 +1,81 @@
+from datetime import datetime
+import json
 from pathlib import Path
-from typing import Union, Optional
-from .notion import NotionDownloader
+from typing import Dict, Union, Optional
+from .notion import NotionDownloader, get_changes, parse_url
 from .json2md import JsonToMdConverter
+from .utils import normalize_id
+from .sinks import Sink, DirectorySink, ZipSink, TarSink, get_sink
 
 
 class NotionExporter:
-    def __init__(self, token: str, strip_meta_chars: Optional[str]=None, extension: str='md', filter: Optional[dict]=None):
-        self.downloader = NotionDownloader(token, filter)
+    def __init__(self, token: str, strip_meta_chars: Optional[str]=None, extension: str='md', filter: Optional[dict]=None, max_workers: int=4):
+        self.downloader = NotionDownloader(token, filter, max_workers)
         self.converter = JsonToMdConverter(strip_meta_chars=strip_meta_chars, extension=extension)
 
-    def export_url(self, url: str, json_dir: Union[str, Path]='./json', md_dir: Union[str, Path]='./md'):
-        """Export the notion page or database."""
-        self.downloader.download_url(url, json_dir)
-        return self.converter.convert(json_dir, md_dir)
+    def export_url(self, url: str, json_dir: Union[str, Path]='./json', md_dir: Union[str, Path]='./md', sink: Optional[Sink]=None) -> dict:
+        """Export the notion page or database. Returns the change journal."""
+        page_id, database_id = parse_url(url)
+        if page_id:
+            return self.export_page(page_id, json_dir, md_dir, sink)
+        return self.export_database(database_id, json_dir, md_dir, sink)
 
-    def export_database(self, database_id: str, json_dir: Union[str, Path]='./json', md_dir: Union[str, Path]='./md'):
-        """Export the notion database and associated pages."""
-        self.downloader.download_database(database_id, json_dir)
-        self.converter.convert(json_dir, md_dir)
+    def export_database(self, database_id: str, json_dir: Union[str, Path]='./json', md_dir: Union[str, Path]='./md', sink: Optional[Sink]=None) -> dict:
+        """Export the notion database and associated pages. Returns the change journal."""
+        changes = self.downloader.download_database(database_id, json_dir)
+        return self.convert(changes, json_dir, sink or DirectorySink(md_dir))
 
-    def export_page(self, page_id: str, json_dir: Union[str, Path]='./json', md_dir: Union[str, Path]='./md'):
-        """Export the notion page."""
-        self.downloader.download_page(page_id, json_dir)
-        self.converter.convert(json_dir, md_dir)
\ No newline at end of file
+    def export_page(self, page_id: str, json_dir: Union[str, Path]='./json', md_dir: Union[str, Path]='./md', sink: Optional[Sink]=None) -> dict:
+        """Export the notion page. Returns the change journal."""
+        page_id = normalize_id(page_id)
+        changes = self.downloader.download_page(page_id, Path(json_dir) / f"{page_id}.json")
+        return self.convert(changes, json_dir, sink or DirectorySink(md_dir), page_id)
+
+    def convert(self, changes: dict, json_dir: Union[str, Path], sink: Sink, page_id: Optional[str]=None) -> dict:
+        """
+        Convert downloaded json, removing markdown for deleted pages. Changes
+        are reported against the last export that completed, so pages from a
+        failed conversion are reported again on the next run. A page export
+        only compares against that page.
+        """
+        prev = self.load_journal(json_dir)
+        if prev is not None:
+            if page_id is not None:
+                prev = {id: time for id, time in prev.items() if id == page_id}
+            changes = get_changes(prev, changes["added"] + changes["updated"] + changes["unchanged"])
+
+        self.converter.convert(json_dir, sink.path, sink)
+        for page in changes["deleted"]:
+            sink.remove(self.converter.get_name(page["id"]))
+        return self.save_journal(changes, json_dir, sink.path)
+
+    def load_journal(self, json_dir: Union[str, Path]) -> Optional[Dict[str, datetime]]:
+        """Load page ids and last edited times exported by the last journal."""
+        path = Path(json_dir) / "changes.json"
+        if not path.exists():
+            return None
+        with open(path) as f:
+            journal = json.load(f)
+        return {
+            page["id"]: self.downloader.transformer.forward_one(page)["last_edited_time"]
+            for key in ("added", "updated", "unchanged") for page in journal[key]
+        }
+
+    def save_journal(self, changes: dict, json_dir: Union[str, Path], output: Union[str, Path]) -> dict:
+        """
+        Write the change journal to `changes.json` in the json directory, so
+        downstream builds can rebuild only the pages that changed. Each page
+        lists its id, last edited time and markdown path relative to `output`.
+        Outputs of deleted pages have already been removed. The returned
+        journal matches `changes.json`, with timestamps as ISO strings.
+        """
+        reverse = self.downloader.transformer.reverse
+        journal = {"output": str(output)}
+        for key, pages in changes.items():
+            journal[key] = [{
+                "id": page["id"],
+                "last_edited_time": reverse(page["last_edited_time"]),
+                "path": self.converter.get_name(page["id"]),
+            } for page in pages]
+        self.downloader.io.save(journal, Path(json_dir) / "changes.json")
+        return journal
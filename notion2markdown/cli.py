@@ -1,5 +1,5 @@
 
-from notion2markdown import NotionExporter
+from notion2markdown import NotionExporter, get_sink
 from argparse import ArgumentParser
 from notion2markdown.utils import logger
 import os
@@ -19,6 +19,9 @@ def main():
     parser.add_argument('--extension', type=str, help='The file extension to output', default="md")
     parser.add_argument('--strip-meta-chars', type=str, help='Strip characters from frontmatter')
     parser.add_argument('--no-filter', help='Filter for notion export', action="store_true")
+    parser.add_argument('--max-workers', type=int, help='Maximum number of database data sources to query at once', default=4)
+    parser.add_argument('--out', type=str, help='Output directory, or a .zip/.tar/.tar.gz/.tar.bz2/.tar.xz archive to stream pages into', default="./md")
+    parser.add_argument('--compress-level', type=int, help='Compression level for archive output')
     args = parser.parse_args()
 
     token = args.token or os.environ.get("NOTION_TOKEN")
@@ -33,6 +36,15 @@ def main():
     else:
         filter = DEFAULT_FILTER
 
-    exporter = NotionExporter(token=token, strip_meta_chars=strip_meta_chars, extension=extension, filter=filter)
-    path = exporter.export_url(url=args.url)
-    logger.info(f"Exported to {path} directory")
\ No newline at end of file
+    if args.max_workers < 1:
+        parser.error("--max-workers must be at least 1")
+
+    try:
+        sink = get_sink(args.out, args.compress_level)
+    except ValueError as e:
+        parser.error(str(e))
+
+    exporter = NotionExporter(token=token, strip_meta_chars=strip_meta_chars, extension=extension, filter=filter, max_workers=args.max_workers)
+    journal = exporter.export_url(url=args.url, sink=sink)
+    counts = ", ".join(f"{len(journal[key])} {key}" for key in ("added", "updated", "deleted", "unchanged"))
+    logger.info(f"Exported to {journal['output']} ({counts})")
\ No newline at end of file
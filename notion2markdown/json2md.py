@@ -3,8 +3,9 @@ from datetime import datetime
 import glob
 import json
 from pathlib import Path
-from typing import List, Union
-from .utils import normalize_id, get_whitespace
+from typing import List, Optional, Union
+from .sinks import Sink, DirectorySink
+from .utils import normalize_id, get_whitespace, iter_json_array
 
 class Noop:
     pass
@@ -33,6 +34,10 @@ class JsonToMdConverter:
 
         return value.strip(self.stripchars)
 
+    def get_name(self, page_id: str) -> str:
+        """Name of the page's markdown, relative to the output directory."""
+        return f"{page_id}.{self.extention}"
+
     def get_post_metadata(self, post):
         converter = JsonToMd(config={"apply_list": {"delimiter": ","}})
         return {
@@ -41,38 +46,46 @@ class JsonToMdConverter:
             if converter.json2md(value)
         }
 
-    def convert(self, json_dir: Union[str, Path], md_dir: Union[str, Path]):
+    def convert(self, json_dir: Union[str, Path], md_dir: Union[str, Path], sink: Optional[Sink]=None):
+        """
+        Convert downloaded json to markdown. Pages are written to `sink`, which
+        defaults to one file per page in `md_dir`. Pass a `ZipSink` or
+        `TarSink` to stream pages straight into an archive instead. The sink
+        is closed once conversion finishes.
+        """
         json_dir = Path(json_dir)
         json_dir.mkdir(parents=True, exist_ok=True)
 
-        md_dir = Path(md_dir)
-        md_dir.mkdir(parents=True, exist_ok=True)
+        sink = sink or DirectorySink(md_dir)
+
+        paths = [
+            path for path in glob.glob(str(json_dir / "*.json"))
+            if Path(path).name not in ("database.json", "changes.json")
+        ]
+        page_ids = {Path(path).stem for path in paths}
 
+        # Stream the database, keeping metadata only for pages being converted
         with open(json_dir / "database.json") as f:
             page_id_to_metadata = {
-                page["id"]: self.get_post_metadata(page) for page in json.load(f)
+                page["id"]: self.get_post_metadata(page)
+                for page in iter_json_array(f) if page["id"] in page_ids
             }
 
-        paths = [
-            path for path in glob.glob(str(json_dir / "*.json"))
-            if Path(path).name != "database.json"
-        ]
-        for path in paths:
-            with open(path) as f:
-                blocks = json.load(f)
+        with sink:
+            for path in paths:
+                with open(path) as f:
+                    blocks = json.load(f)
                 page_id = Path(path).stem
-                path = md_dir / f"{page_id}.{self.extention}"
                 if page_id not in page_id_to_metadata:  # page has been deleted
                     continue
                 metadata = page_id_to_metadata[page_id]
                 markdown = JsonToMd(metadata).page2md(blocks)
-                with open(path, "w", encoding='utf-8') as f:
-                    f.write(markdown)
+                path = sink.write(self.get_name(page_id), markdown)
 
                 if len(paths) == 1:
                     return path
 
-        return md_dir
+        return sink.path
 
 
 class JsonToMd:
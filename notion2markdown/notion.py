@@ -1,62 +1,121 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 import json
-from typing import List, Union, Optional
-from .utils import logger, normalize_id
+from typing import Dict, Iterator, List, Tuple, Union, Optional
+from .utils import logger, normalize_id, iter_json_array
 
-from notion_client import Client
+from notion_client import APIErrorCode, APIResponseError, Client
 from notion_client.helpers import iterate_paginated_api as paginate
 
 
 class NotionDownloader:
-    def __init__(self, token: str, filter: Optional[str]=None):
+    def __init__(self, token: str, filter: Optional[str]=None, max_workers: int=4):
         self.transformer = LastEditedToDateTime()
-        self.notion = NotionClient(token=token, transformer=self.transformer, filter=filter)
+        self.notion = NotionClient(token=token, transformer=self.transformer, filter=filter, max_workers=max_workers)
         self.io = NotionIO(self.transformer)
 
-    def download_url(self, url: str, out_dir: Union[str, Path]='./json'):
+    def download_url(self, url: str, out_dir: Union[str, Path]='./json') -> dict:
         """Download the notion page or database."""
         out_dir = Path(out_dir)
-        slug = url.split("/")[-1].split('?')[0]
-        if '-' in slug:
-            page_id = slug.split('-')[-1]
-            self.download_page(page_id, out_dir / f"{page_id}.json")
-        else:
-            self.download_database(slug, out_dir)
+        page_id, database_id = parse_url(url)
+        if page_id:
+            return self.download_page(page_id, out_dir / f"{page_id}.json")
+        return self.download_database(database_id, out_dir)
 
-    def download_page(self, page_id: str, out_path: Union[str, Path]='./json', fetch_metadata: bool=True):
-        """Download the notion page."""
+    def download_page(self, page_id: str, out_path: Union[str, Path]='./json', fetch_metadata: bool=True) -> Optional[dict]:
+        """Download the notion page. Returns changes if metadata is fetched."""
         out_path = Path(out_path)
         out_path.parent.mkdir(parents=True, exist_ok=True)
         blocks = self.notion.get_blocks(page_id)
         self.io.save(blocks, out_path)
 
         if fetch_metadata:
+            # Only compare against this page, so pages from an earlier
+            # database export into the same directory aren't reported deleted
+            path = out_path.parent / "database.json"
             metadata = self.notion.get_metadata(page_id)
-            self.io.save([metadata], out_path.parent / "database.json")
-
-    def download_database(self, database_id: str, out_dir: Union[str, Path]='./json'):
+            prev = {
+                id: time for id, time in self.io.load_timestamps(path).items()
+                if id == metadata["id"]
+            }
+            self.io.save([metadata], path)
+            return get_changes(prev, [metadata])
+
+    def download_database(self, database_id: str, out_dir: Union[str, Path]='./json') -> dict:
         """Download the notion database and associated pages."""
         out_dir = Path(out_dir)
         out_dir.mkdir(parents=True, exist_ok=True)
         path = out_dir / "database.json"
-        prev = {pg["id"]: pg["last_edited_time"] for pg in self.io.load(path)}
+        prev = self.io.load_timestamps(path)
         pages = self.notion.get_database(database_id)  # download database
         self.io.save(pages, path)
 
-        for cur in pages:  # download individual pages in database IF updated
-            if prev.get(cur["id"], datetime(1, 1, 1)) < cur["last_edited_time"]:
-                self.download_page(cur["id"], out_dir / f"{cur['id']}.json", False)
-                logger.info(f"Downloaded {cur['url']}")
+        changes = get_changes(prev, pages)
+        for cur in changes["added"] + changes["updated"]:  # download individual pages in database IF updated
+            self.download_page(cur["id"], out_dir / f"{cur['id']}.json", False)
+            logger.info(f"Downloaded {cur['url']}")
+        self.remove_deleted(changes, out_dir)
+        return changes
+
+    def remove_deleted(self, changes: dict, out_dir: Path):
+        """Remove json for pages that are no longer in the database."""
+        for cur in changes["deleted"]:
+            path = out_dir / f"{cur['id']}.json"
+            if path.exists():
+                path.unlink()
+
+
+def parse_url(url: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Split a notion url into a (page id, database id) pair, one of which is set.
+
+    >>> parse_url("https://lvinwan.notion.site/Example-Notion-Page-f8deb4d042034c6c8d03b6de37a99498")
+    ('f8deb4d042034c6c8d03b6de37a99498', None)
+    >>> parse_url("https://www.notion.so/f8deb4d042034c6c8d03b6de37a99498?v=1")
+    (None, 'f8deb4d042034c6c8d03b6de37a99498')
+    """
+    slug = url.split("/")[-1].split('?')[0]
+    if '-' in slug:
+        return slug.split('-')[-1], None
+    return None, slug
+
+
+def get_changes(prev: dict, pages: List[dict]) -> dict:
+    """
+    Compare freshly downloaded pages against the previous page id to
+    last-edited-time mapping.
+
+    >>> old, new = datetime(2024, 1, 1), datetime(2024, 2, 1)
+    >>> prev = {"a": old, "b": old, "c": old}
+    >>> pages = [{"id": "a", "last_edited_time": new}, {"id": "b", "last_edited_time": old}, {"id": "d", "last_edited_time": new}]
+    >>> {key: [pg["id"] for pg in value] for key, value in get_changes(prev, pages).items()}
+    {'added': ['d'], 'updated': ['a'], 'deleted': ['c'], 'unchanged': ['b']}
+    """
+    changes = {"added": [], "updated": [], "deleted": [], "unchanged": []}
+    for cur in pages:
+        if cur["id"] not in prev:
+            changes["added"].append(cur)
+        elif prev[cur["id"]] < cur["last_edited_time"]:
+            changes["updated"].append(cur)
+        else:
+            changes["unchanged"].append(cur)
+    ids = {cur["id"] for cur in pages}
+    changes["deleted"] = [
+        {"id": id, "last_edited_time": time} for id, time in prev.items() if id not in ids
+    ]
+    return changes
 
 
 class LastEditedToDateTime:
     def forward(self, blocks, key: str = "last_edited_time") -> List:
-        return [{
-            **block,
-            'last_edited_time': datetime.fromisoformat(block['last_edited_time'][:-1]),
-            'id': normalize_id(block['id']),
-        } for block in blocks]
+        return [self.forward_one({**block}) for block in blocks]
+
+    def forward_one(self, block: dict) -> dict:
+        # Updates the block in place, so streamed blocks aren't copied again.
+        block['last_edited_time'] = datetime.fromisoformat(block['last_edited_time'][:-1])
+        block['id'] = normalize_id(block['id'])
+        return block
 
     def reverse(self, o) -> Union[None, str]:
         if isinstance(o, datetime):
@@ -69,10 +128,18 @@ class NotionIO:
 
     def load(self, path: Union[str, Path]) -> List[dict]:
         """Load blocks from json file."""
+        return list(self.iterate(path))
+
+    def iterate(self, path: Union[str, Path]) -> Iterator[dict]:
+        """Lazily load blocks from json file, one at a time."""
         if Path(path).exists():
             with open(path) as f:
-                return self.transformer.forward(json.load(f))
-        return []
+                for block in iter_json_array(f):
+                    yield self.transformer.forward_one(block)
+
+    def load_timestamps(self, path: Union[str, Path]) -> Dict[str, datetime]:
+        """Load only the id and last edited time of each block in json file."""
+        return {block["id"]: block["last_edited_time"] for block in self.iterate(path)}
 
     def save(self, blocks: List[dict], path: str):
         """Dump blocks to json file."""
@@ -81,11 +148,14 @@ class NotionIO:
 
 
 class NotionClient:
-    def __init__(self, token: str, transformer, filter: Optional[dict]=None):
+    def __init__(self, token: str, transformer, filter: Optional[dict]=None, max_workers: int=4):
         # NOTE: The 2025-09-03 API version requires data source aware calls.
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}")
         self.client = Client(auth=token, notion_version="2025-09-03")
         self.transformer = transformer
         self.filter = filter
+        self.max_workers = max_workers
 
     def get_metadata(self, page_id: str) -> dict:
         """Get page metadata as json."""
@@ -114,7 +184,8 @@ class NotionClient:
         """Fetch pages in database as json."""
         # -- Step 1 ---------------------------------------------------------
         # Retrieve the data sources for this database. The first entry is the
-        # original database source which mirrors the legacy behaviour.
+        # original database source which mirrors the legacy behaviour; any
+        # others were merged into the database later.
         database = self.client.databases.retrieve(database_id=database_id)
         data_sources = database.get("data_sources", [])
 
@@ -128,12 +199,40 @@ class NotionClient:
             )
             return list(self.transformer.forward(results))
 
-        data_source_id = data_sources[0]["id"]
-
         # -- Step 2 ---------------------------------------------------------
-        # Query the new data source endpoint. The request mirrors the legacy
-        # paginate() usage so downstream code can remain unchanged.
-        def query_data_source(start_cursor=None):
+        # Query every data source. A merged database has several, so paginate
+        # them concurrently, at most `max_workers` at a time. Merged sources
+        # may not share the primary source's schema, so one that rejects the
+        # filter is skipped rather than failing the whole export. Any other
+        # error, e.g. rate limiting, fails the export so no pages look deleted.
+        def query(source):
+            try:
+                return self.query_data_source(source["id"])
+            except APIResponseError as e:
+                if source is data_sources[0] or e.code != APIErrorCode.ValidationError:
+                    raise
+                logger.warning(f"Skipped data source {source.get('name') or source['id']}: {e}")
+                return []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(query, data_sources))
+
+        # -- Step 3 ---------------------------------------------------------
+        # Merge rows, tagging each with its data source. A page reachable from
+        # several data sources is kept once, at its most recent edit.
+        pages = {}
+        for source, rows in zip(data_sources, results):
+            for row in self.transformer.forward(rows):
+                row["data_source_id"] = normalize_id(source["id"])
+                if row["id"] not in pages or pages[row["id"]]["last_edited_time"] < row["last_edited_time"]:
+                    pages[row["id"]] = row
+        return list(pages.values())
+
+    def query_data_source(self, data_source_id: str) -> List:
+        """Fetch all pages in a data source as json."""
+        # The request mirrors the legacy paginate() usage so downstream code
+        # can remain unchanged.
+        def query(start_cursor=None):
             body = {}
             if self.filter:
                 body["filter"] = self.filter
@@ -145,5 +244,4 @@ class NotionClient:
                 body=body or {},
             )
 
-        results = paginate(query_data_source)
-        return list(self.transformer.forward(results))
+        return list(paginate(query))
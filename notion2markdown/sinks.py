@@ -0,0 +1,220 @@
+from abc import ABC, abstractmethod
+from io import BytesIO
+import os
+from pathlib import Path
+import tarfile
+import time
+from typing import Optional, Union
+import zipfile
+
+
+class Sink(ABC):
+    """Destination for converted pages. Used as a context manager."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    def open(self):
+        pass
+
+    @abstractmethod
+    def write(self, name: str, text: str) -> Path:
+        """Write one page and return where it can be found."""
+
+    def remove(self, name: str):
+        """Remove a page written by a previous conversion, if any."""
+        pass
+
+    def close(self):
+        pass
+
+    def abort(self):
+        """Called instead of `close` when conversion fails."""
+        self.close()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class DirectorySink(Sink):
+    """Write each page to its own file in a directory. This is the default."""
+
+    def open(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def write(self, name: str, text: str) -> Path:
+        path = self.path / name
+        with open(path, "w", encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def remove(self, name: str):
+        path = self.path / name
+        if path.exists():
+            path.unlink()
+
+
+class ArchiveSink(Sink):
+    """
+    Stream pages into an archive. The archive is built in a sibling temporary
+    file and only replaces the previous archive once conversion succeeds.
+    """
+
+    levels = range(0, 10)
+
+    def __init__(self, path: Union[str, Path], compresslevel: Optional[int]=None):
+        super().__init__(path)
+        if compresslevel is not None and compresslevel not in self.levels:
+            raise ValueError(
+                f"Compression level must be between {self.levels[0]} and {self.levels[-1]}, got {compresslevel}"
+            )
+        self.compresslevel = compresslevel
+        self.tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        self.archive = None
+
+    @abstractmethod
+    def open_archive(self, path: Path):
+        """Open and return the archive at `path` for writing."""
+
+    def open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.archive = self.open_archive(self.tmp_path)
+
+    def write(self, name: str, text: str) -> Path:
+        self.write_entry(name, text.encode('utf-8'))
+        return self.path
+
+    @abstractmethod
+    def write_entry(self, name: str, data: bytes):
+        """Add one file to the open archive."""
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+            os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+        if self.tmp_path.exists():
+            self.tmp_path.unlink()
+
+
+class ZipSink(ArchiveSink):
+    """
+    Stream pages straight into a zip archive. The archive is rewritten on
+    every conversion, so removed pages drop out.
+
+    >>> import tempfile, zipfile
+    >>> path = Path(tempfile.mkdtemp()) / "md.zip"
+    >>> with ZipSink(path, compresslevel=9) as sink:
+    ...     sink.write("page.md", "# Hello") == path
+    True
+    >>> zipfile.ZipFile(path).read("page.md")
+    b'# Hello'
+    >>> with ZipSink(path) as sink:
+    ...     _ = sink.write("other.md", "# Bye")
+    ...     raise RuntimeError("conversion failed")
+    Traceback (most recent call last):
+    ...
+    RuntimeError: conversion failed
+    >>> zipfile.ZipFile(path).namelist()  # previous archive is kept
+    ['page.md']
+    >>> ZipSink(path, compresslevel=42)
+    Traceback (most recent call last):
+    ...
+    ValueError: Compression level must be between 0 and 9, got 42
+    """
+
+    def open_archive(self, path: Path):
+        return zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=self.compresslevel)
+
+    def write_entry(self, name: str, data: bytes):
+        self.archive.writestr(name, data)
+
+
+class TarSink(ArchiveSink):
+    """
+    Stream pages straight into a tar archive. The archive is gzipped unless
+    `compression` says otherwise ('', 'gz', 'bz2' or 'xz'), and is rewritten
+    on every conversion.
+
+    >>> import tempfile, tarfile
+    >>> path = Path(tempfile.mkdtemp()) / "md.tar.gz"
+    >>> with TarSink(path, compresslevel=1) as sink:
+    ...     sink.write("page.md", "# Hello") == path
+    True
+    >>> tarfile.open(path).extractfile("page.md").read()
+    b'# Hello'
+    >>> TarSink("md.tar", compresslevel=1, compression="")
+    Traceback (most recent call last):
+    ...
+    ValueError: Compression level is not supported for uncompressed tar archives
+    >>> TarSink("md.tar.bz2", compresslevel=0, compression="bz2")
+    Traceback (most recent call last):
+    ...
+    ValueError: Compression level must be between 1 and 9, got 0
+    """
+
+    def __init__(self, path: Union[str, Path], compresslevel: Optional[int]=None, compression: str="gz"):
+        if compresslevel is not None and not compression:
+            raise ValueError("Compression level is not supported for uncompressed tar archives")
+        self.compression = compression
+        if compression == "bz2":
+            self.levels = range(1, 10)
+        super().__init__(path, compresslevel)
+
+    def open_archive(self, path: Path):
+        kwargs = {}
+        if self.compression in ("gz", "bz2") and self.compresslevel is not None:
+            kwargs["compresslevel"] = self.compresslevel
+        elif self.compression == "xz" and self.compresslevel is not None:
+            kwargs["preset"] = self.compresslevel
+        return tarfile.open(path, f"w:{self.compression}", **kwargs)
+
+    def write_entry(self, name: str, data: bytes):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self.archive.addfile(info, BytesIO(data))
+
+
+def get_sink(path: Union[str, Path], compresslevel: Optional[int]=None) -> Sink:
+    """
+    Pick a sink from the output path's suffix. Anything that doesn't look like
+    an archive is treated as a directory.
+
+    >>> type(get_sink("md")).__name__
+    'DirectorySink'
+    >>> type(get_sink("md.zip")).__name__
+    'ZipSink'
+    >>> get_sink("md.tar.xz").compression
+    'xz'
+    >>> get_sink("md", compresslevel=9)
+    Traceback (most recent call last):
+    ...
+    ValueError: Compression level is only supported for archive outputs
+    """
+    name = str(path)
+    if name.endswith(".zip"):
+        return ZipSink(path, compresslevel)
+    for suffixes, compression in (
+        ((".tar.gz", ".tgz"), "gz"),
+        ((".tar.bz2", ".tbz2"), "bz2"),
+        ((".tar.xz", ".txz"), "xz"),
+        ((".tar",), ""),
+    ):
+        if name.endswith(suffixes):
+            return TarSink(path, compresslevel, compression)
+    if compresslevel is not None:
+        raise ValueError("Compression level is only supported for archive outputs")
+    return DirectorySink(path)
@@ -1,9 +1,13 @@
+import json
 import logging
+import re
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('notion2markdown')
 
+DELIMITER = re.compile(r'\s*[,\]]')
+
 
 def normalize_id(id: str) -> str:
     return id.replace('-', '')
@@ -14,4 +18,63 @@ def get_whitespace(line, leading=True):
         stripped = line.lstrip()
         return line[:-len(stripped)], stripped
     stripped = line.rstrip()
-    return line[len(stripped):], stripped
\ No newline at end of file
+    return line[len(stripped):], stripped
+
+def iter_json_array(f, chunk_size: int = 1 << 16):
+    """
+    Lazily yield items of the json array in file `f`, reading it in chunks so
+    only one item is held in memory at a time.
+
+    >>> from io import StringIO
+    >>> list(iter_json_array(StringIO(' [{"id": "a"}, {"id": "b", "n": [1, 2]}, 345 ] '), chunk_size=4))
+    [{'id': 'a'}, {'id': 'b', 'n': [1, 2]}, 345]
+    >>> list(iter_json_array(StringIO('[]')))
+    []
+    >>> [list(iter_json_array(StringIO('[1.5e10, 2.25, -7]'), chunk_size=size)) for size in (3, 5)]
+    [[15000000000.0, 2.25, -7], [15000000000.0, 2.25, -7]]
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, size, eof = "", 0, chunk_size, False
+
+    def read():
+        nonlocal buffer, pos, size, eof
+        chunk = f.read(size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    def peek():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or eof:
+                return buffer[pos:pos + 1]
+            read()
+
+    if peek() != "[":
+        raise ValueError("Expected a json array")
+    pos += 1
+    if peek() == "]":
+        return
+    while True:
+        peek()
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            item, end = None, None
+        # Without a following delimiter, a number like 1.5e10 may be cut short
+        if end is None or (not eof and not DELIMITER.match(buffer, end)):
+            if eof:
+                raise ValueError("Truncated json array")
+            size *= 2  # grow reads so large items aren't re-parsed too often
+            read()
+            continue
+        size, pos = chunk_size, end
+        yield item
+
+        token = peek()
+        if token == "]":
+            return
+        if token != ",":
+            raise ValueError(f"Expected ',' or ']' in json array, got {token!r}")
+        pos += 1
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from notion2markdown import NotionExporter
+
+
+def page(id, last_edited_time="2024-01-01T00:00:00.000Z"):
+    return {
+        "id": id,
+        "url": f"https://notion.so/{id}",
+        "last_edited_time": last_edited_time,
+        "properties": {"Name": {"type": "title", "title": [{"type": "text", "text": {"content": "Hello"}}]}},
+    }
+
+
+def get_exporter(pages):
+    exporter = NotionExporter("token")
+    notion = exporter.downloader.notion
+    notion.get_blocks = lambda page_id: [{"type": "paragraph", "paragraph": {"rich_text": []}, "children": []}]
+    notion.get_metadata = lambda page_id: notion.transformer.forward([page(page_id)])[0]
+    notion.get_database = lambda database_id: notion.transformer.forward(pages)
+    return exporter
+
+
+def test_export_page_with_dashed_id(tmp_path):
+    exporter = get_exporter([])
+    journal = exporter.export_page("cccc-3", tmp_path / "json", tmp_path / "md")
+
+    assert [page["path"] for page in journal["added"]] == ["cccc3.md"]
+    assert (tmp_path / "md" / "cccc3.md").read_text().startswith("---\nName: Hello\n")
+
+
+def test_export_database_removes_deleted_pages(tmp_path):
+    pages = [page("aaaa-1"), page("bbbb-2")]
+    exporter = get_exporter(pages)
+    exporter.export_database("database", tmp_path / "json", tmp_path / "md")
+    assert (tmp_path / "md" / "bbbb2.md").exists()
+
+    pages.pop()
+    journal = exporter.export_database("database", tmp_path / "json", tmp_path / "md")
+
+    assert journal["deleted"] == [{"id": "bbbb2", "last_edited_time": "2024-01-01T00:00:00Z", "path": "bbbb2.md"}]
+    assert [page["id"] for page in journal["unchanged"]] == ["aaaa1"]
+    assert not (tmp_path / "md" / "bbbb2.md").exists()
+    assert not (tmp_path / "json" / "bbbb2.json").exists()
+    assert json.loads((tmp_path / "json" / "changes.json").read_text()) == journal
+
+
+def test_export_page_keeps_database_outputs(tmp_path):
+    exporter = get_exporter([page("aaaa-1")])
+    exporter.export_database("database", tmp_path / "json", tmp_path / "md")
+    journal = exporter.export_page("cccc-3", tmp_path / "json", tmp_path / "md")
+
+    assert journal["deleted"] == []
+    assert [page["id"] for page in journal["added"]] == ["cccc3"]
+    assert (tmp_path / "md" / "aaaa1.md").exists()
+    assert (tmp_path / "json" / "aaaa1.json").exists()
+
+
+def test_failed_conversion_is_reported_again(tmp_path, monkeypatch):
+    pages = [page("aaaa-1")]
+    exporter = get_exporter(pages)
+    exporter.export_database("database", tmp_path / "json", tmp_path / "md")
+
+    pages.append(page("bbbb-2"))
+    pages[0] = page("aaaa-1", "2024-02-01T00:00:00.000Z")
+    convert = exporter.converter.convert
+
+    def fail(*args):
+        raise NotImplementedError("Unsupported block type")
+
+    monkeypatch.setattr(exporter.converter, "convert", fail)
+    with pytest.raises(NotImplementedError):
+        exporter.export_database("database", tmp_path / "json", tmp_path / "md")
+
+    monkeypatch.setattr(exporter.converter, "convert", convert)
+    journal = exporter.export_database("database", tmp_path / "json", tmp_path / "md")
+    assert [page["id"] for page in journal["added"]] == ["bbbb2"]
+    assert [page["id"] for page in journal["updated"]] == ["aaaa1"]
@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import httpx
+import pytest
+from notion_client import APIResponseError
+
+from notion2markdown.notion import LastEditedToDateTime, NotionClient
+
+
+class StubDatabases:
+    def __init__(self, data_sources):
+        self.data_sources = data_sources
+
+    def retrieve(self, database_id):
+        return {"data_sources": [{"id": id, "name": id} for id in self.data_sources]}
+
+
+class StubClient:
+    """Answers data source queries from a mapping of data source id to rows."""
+
+    def __init__(self, data_sources):
+        self.data_sources = data_sources
+        self.databases = StubDatabases(data_sources)
+
+    def request(self, path, method, body):
+        rows = self.data_sources[path.split("/")[1]]
+        if isinstance(rows, Exception):
+            raise rows
+        return {"object": "list", "results": rows, "next_cursor": None, "has_more": False}
+
+
+def row(id, last_edited_time):
+    return {"id": id, "last_edited_time": last_edited_time}
+
+
+def get_client(data_sources):
+    client = NotionClient("token", LastEditedToDateTime())
+    client.client = StubClient(data_sources)
+    return client
+
+
+def validation_error():
+    return APIResponseError("validation_error", 400, "Could not find property Status", httpx.Headers(), "")
+
+
+def rate_limited():
+    return APIResponseError("rate_limited", 429, "Rate limited", httpx.Headers(), "")
+
+
+def test_get_database_merges_data_sources():
+    client = get_client({
+        "source-1": [row("page-1", "2024-01-01T00:00:00.000Z"), row("page-2", "2024-01-01T00:00:00.000Z")],
+        "source-2": [row("page1", "2024-02-01T00:00:00.000Z"), row("page-3", "2024-01-01T00:00:00.000Z")],
+    })
+    pages = {page["id"]: page for page in client.get_database("database")}
+
+    assert sorted(pages) == ["page1", "page2", "page3"]
+    assert pages["page1"]["last_edited_time"] == datetime(2024, 2, 1)
+    assert pages["page1"]["data_source_id"] == "source2"
+    assert pages["page2"]["data_source_id"] == "source1"
+    assert pages["page3"]["data_source_id"] == "source2"
+
+
+def test_get_database_skips_failing_merged_source():
+    client = get_client({
+        "source-1": [row("page-1", "2024-01-01T00:00:00.000Z")],
+        "source-2": validation_error(),
+    })
+    assert [page["id"] for page in client.get_database("database")] == ["page1"]
+
+
+def test_get_database_raises_for_failing_primary_source():
+    client = get_client({
+        "source-1": validation_error(),
+        "source-2": [row("page-1", "2024-01-01T00:00:00.000Z")],
+    })
+    with pytest.raises(APIResponseError):
+        client.get_database("database")
+
+
+def test_get_database_raises_for_rate_limited_merged_source():
+    client = get_client({
+        "source-1": [row("page-1", "2024-01-01T00:00:00.000Z")],
+        "source-2": rate_limited(),
+    })
+    with pytest.raises(APIResponseError):
+        client.get_database("database")
+
+
+def test_max_workers_must_be_positive():
+    with pytest.raises(ValueError):
+        NotionClient("token", LastEditedToDateTime(), max_workers=0)